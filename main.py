@@ -1,11 +1,22 @@
 import os
-import json
+import re
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager, suppress
+from typing import Literal
 import fitz  
+import orjson
+import tiktoken
+import httpx
+import jinja2
 from fastapi import FastAPI, File, UploadFile, Request, Query, HTTPException
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from dotenv import load_dotenv
 from mistralai import Mistral
+from pydantic import BaseModel, field_validator
 
 # Load the .env file
 load_dotenv()
@@ -14,73 +25,293 @@ load_dotenv()
 MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
 client = None
 if MISTRAL_API_KEY:
-    client = Mistral(api_key=MISTRAL_API_KEY)
+    # Shared keep-alive HTTP/2 pools, so parallel calls reuse TLS connections
+    http_limits = httpx.Limits(max_keepalive_connections=32, max_connections=64)
+    client = Mistral(
+        api_key=MISTRAL_API_KEY,
+        client=httpx.Client(http2=True, limits=http_limits, timeout=60, follow_redirects=True),
+        async_client=httpx.AsyncClient(http2=True, limits=http_limits, timeout=60, follow_redirects=True),
+    )
 else:
     print("Warning: MISTRAL_API_KEY not found in .env file.")
 
+# Tokenizer used to cap how much text is sent to Mistral. tiktoken may have to
+# download the encoding, so it is loaded in the background from the lifespan
+# (retrying on failure) and never on a request; until then we fall back to a
+# character slice at roughly 4 characters per token
+MAX_PROMPT_TOKENS = 1500
+CHARS_PER_TOKEN = 4
+TOKENIZER_RETRY_SECONDS = 60
+tokenizer = None
+
+def load_tokenizer():
+    global tokenizer
+    try:
+        tokenizer = tiktoken.get_encoding("cl100k_base")
+        return True
+    except Exception as e:
+        print(f"Warning: could not load tiktoken encoding, capping prompts by characters for now: {e}")
+        return False
+
+async def keep_loading_tokenizer():
+    while not await asyncio.to_thread(load_tokenizer):
+        await asyncio.sleep(TOKENIZER_RETRY_SECONDS)
+
+def truncate_to_tokens(text: str, max_tokens: int = MAX_PROMPT_TOKENS):
+    encoding = tokenizer
+    if encoding is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    # Treat special-token strings such as <|endoftext|> as plain text
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+# Start the quiz batcher and the tokenizer load with the app, stop both on shutdown
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_quiz_batcher()
+    tokenizer_task = asyncio.create_task(keep_loading_tokenizer())
+    tokenizer_task.add_done_callback(log_task_error)
+    yield
+    tokenizer_task.cancel()
+    await stop_quiz_batcher()
+
 # Create the FastAPI app
-app = FastAPI(title="Research Paper Simplifier")
+app = FastAPI(title="Research Paper Simplifier", lifespan=lifespan)
 
 # Tell FastAPI to use the 'templates' folder for HTML files
 templates = Jinja2Templates(directory="templates")
 
+# Compiled templates survive reloads via an on-disk bytecode cache
+os.makedirs(".jinja_cache", exist_ok=True)
+templates.env.bytecode_cache = jinja2.FileSystemBytecodeCache(".jinja_cache")
+
+# Parse and compile every page up front so the first request is not slower
+for name in ["index.html", "results.html", "quiz.html", "flashcards.html"]:
+    templates.env.get_template(name)
+
+# The homepage has no per-request context, so it is rendered only once
+index_html = templates.env.get_template("index.html").render()
+
+
+# Optional local embedding model for the semantic cache
+embedder = None
+try:
+    import faiss
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    print("Info: sentence-transformers/faiss not installed, semantic cache disabled.")
+else:
+    # The model may need a download; never let that stop the app from starting
+    try:
+        embedder = SentenceTransformer("all-MiniLM-L6-v2")
+    except Exception as e:
+        print(f"Warning: could not load embedding model, semantic cache disabled: {e}")
+
+
+# In-memory LRU cache for LLM responses, keyed by a hash of the abstract
+LLM_CACHE_SIZE = 512
+llm_cache = OrderedDict()
+cache_lock = threading.Lock()
+
+# Semantic cache: one FAISS index per (kind, params), parallel to a list of responses.
+# Note that all-MiniLM-L6-v2 only reads the first 256 word pieces of its input,
+# so two papers that share an opening paragraph score ~1.0 and will share
+# cached responses even if the rest of their abstracts differ
+SEMANTIC_CACHE_THRESHOLD = 0.95
+semantic_cache = {}
+
+# Embeddings memoized by abstract hash, since the same abstract is looked up
+# and stored several times per upload (summary, quiz, flashcards)
+embedding_cache = OrderedDict()
+
+def make_cache_key(kind: str, text: str, *params):
+    return (kind, hashlib.sha256(text.encode()).hexdigest(), *params)
+
+# Embedding is CPU-bound, so coroutines call the two cache helpers below
+# through asyncio.to_thread
+def embed_text(text: str, text_hash: str):
+    with cache_lock:
+        if text_hash in embedding_cache:
+            embedding_cache.move_to_end(text_hash)
+            return embedding_cache[text_hash]
+
+    vector = embedder.encode([text], normalize_embeddings=True).astype("float32")
+    with cache_lock:
+        embedding_cache[text_hash] = vector
+        if len(embedding_cache) > LLM_CACHE_SIZE:
+            embedding_cache.popitem(last=False)
+    return vector
+
+def get_cached_response(kind: str, text: str, *params):
+    key = make_cache_key(kind, text, *params)
+    with cache_lock:
+        if key in llm_cache:
+            llm_cache.move_to_end(key)
+            return llm_cache[key]
+
+    # Fall back to the nearest previously seen abstract, if close enough
+    if embedder is None:
+        return None
+    vector = embed_text(text, key[1])
+    with cache_lock:
+        entry = semantic_cache.get((kind, *params))
+        if entry is None:
+            return None
+        index, responses = entry
+        scores, ids = index.search(vector, 1)
+        if ids[0][0] != -1 and scores[0][0] >= SEMANTIC_CACHE_THRESHOLD:
+            return responses[ids[0][0]]
+    return None
+
+def cache_response(kind: str, text: str, value, *params):
+    key = make_cache_key(kind, text, *params)
+    with cache_lock:
+        llm_cache[key] = value
+        llm_cache.move_to_end(key)
+        if len(llm_cache) > LLM_CACHE_SIZE:
+            llm_cache.popitem(last=False)
+
+    if embedder is None:
+        return
+    vector = embed_text(text, key[1])
+    with cache_lock:
+        entry = semantic_cache.get((kind, *params))
+        # IndexFlatIP cannot evict single vectors, so start over once it is full
+        if entry is None or len(entry[1]) >= LLM_CACHE_SIZE:
+            entry = (faiss.IndexFlatIP(vector.shape[1]), [])
+            semantic_cache[(kind, *params)] = entry
+        entry[0].add(vector)
+        entry[1].append(value)
+
+
+# Case-insensitive section markers used to locate the abstract
+ABSTRACT_MARKER = re.compile("abstract", re.IGNORECASE)
+INTRODUCTION_MARKER = re.compile("introduction", re.IGNORECASE)
+
+# PyMuPDF is blocking C code, so this runs in a worker thread
+def extract_text_from_pdf(pdf_bytes: bytes):
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    parts = []
+    abstract_seen = False
+    for page in doc:
+        text = page.get_text()
+        parts.append(text)
+        # Only the abstract..introduction span is used, so stop once we have it
+        start = 0
+        if not abstract_seen:
+            start_match = ABSTRACT_MARKER.search(text)
+            if not start_match:
+                continue
+            start = start_match.end()
+        abstract_seen = True
+        if INTRODUCTION_MARKER.search(text, start):
+            break
+    doc.close()
+    return "".join(parts)
+
+
+
+# Response schemas, enforced by Mistral's structured outputs at decode time
+class Question(BaseModel):
+    question: str
+    options: list[str]
+    answer: Literal["A", "B", "C", "D"]
+    explanation: str
+
+    # quiz.html renders exactly options[0..3] as A-D. Checked here rather than
+    # with Field(min_length=...), which the SDK's strict schema builder rejects
+    @field_validator("options")
+    @classmethod
+    def check_four_options(cls, options):
+        if len(options) != 4:
+            raise ValueError(f"expected 4 options, got {len(options)}")
+        return options
+
+class QuizOut(BaseModel):
+    questions: list[Question]
+
+class QuizBatchOut(BaseModel):
+    quizzes: list[QuizOut]
+
+class Flashcard(BaseModel):
+    term: str
+    definition: str
+
+class FlashcardsOut(BaseModel):
+    flashcards: list[Flashcard]
+
+# Keep references to fire-and-forget tasks so they are not garbage collected
+background_tasks = set()
+
+def log_task_error(task):
+    if task.cancelled():
+        return
+    error = task.exception()
+    # A gather whose child was cancelled (e.g. on shutdown) is not a failure
+    if error is not None and not isinstance(error, asyncio.CancelledError):
+        print(f"Error: background task failed: {error!r}")
+
+# LLM calls in flight, keyed like the cache, so identical requests share one call
+pending_requests = {}
+
+async def share_pending(key, make_coro):
+    pending = pending_requests.get(key)
+    if pending is None:
+        pending = asyncio.ensure_future(make_coro())
+        pending_requests[key] = pending
+        pending.add_done_callback(lambda _: pending_requests.pop(key, None))
+    # Shield so one caller disconnecting does not cancel the call for the others
+    return await asyncio.shield(pending)
+
 
 
 # Route 1: The Homepage (GET /)
 @app.get("/", response_class=HTMLResponse)
 async def get_root(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
+    return HTMLResponse(index_html)
 
 
 
 # Route 2: The Upload Handler (POST /upload)
 @app.post("/upload")
 async def upload_paper(request: Request, paper: UploadFile = File(...)): 
-    temp_pdf_path = f"temp_{paper.filename}"  
     try:
-        # Save the uploaded file
-        with open(temp_pdf_path, 'wb') as f:
-            f.write(await paper.read())
+        # Read the uploaded file (already spooled by Starlette)
+        pdf_bytes = await paper.read()
             
-        # Core PDF Extraction
-        doc = fitz.open(temp_pdf_path)
-        full_text = ""
-        for page in doc:
-            full_text += page.get_text()
-        doc.close()
+        # Core PDF Extraction, straight from memory
+        full_text = await asyncio.to_thread(extract_text_from_pdf, pdf_bytes)
 
         # Extract just the abstract
         raw_abstract = "Could not automatically find abstract."
-        try:
-            start_marker = "abstract"
-            end_marker = "introduction"
-            start_index = full_text.lower().find(start_marker)
-            end_index = full_text.lower().find(end_marker, start_index)
-            if start_index != -1 and end_index != -1:
-                raw_abstract = full_text[start_index + len(start_marker) : end_index].strip()
-            elif start_index != -1:
-                raw_abstract = full_text[start_index + len(start_marker) : start_index + 3000].strip()
-        except Exception:
-            raw_abstract = full_text[:3000]
-
-        # Call Mistral API for Summary
-        summary = "Could not generate summary."
-        if client:
-            try:
-                messages = [
-                    {"role": "system", "content": "You are a helpful assistant. Your task is to summarize the following academic abstract into one simple, easy-to-understand paragraph for a non-expert."},
-                    {"role": "user", "content": f"Please summarize this abstract:\n\n{raw_abstract}"}
-                ]
-                
-                chat_response = client.chat.complete(
-                    model="mistral-small-latest",
-                    messages=messages,
-                )
-                summary = chat_response.choices[0].message.content
-            except Exception as e:
-                summary = f"Mistral API error: {e}"
-        else:
-            summary = "Mistral API client not configured. Please set MISTRAL_API_KEY in .env"
+        start_match = ABSTRACT_MARKER.search(full_text)
+        if start_match:
+            # Resume from the abstract marker so the text is only scanned once
+            end_match = INTRODUCTION_MARKER.search(full_text, start_match.end())
+            if end_match:
+                raw_abstract = full_text[start_match.end() : end_match.start()].strip()
+            else:
+                raw_abstract = full_text[start_match.end() : start_match.start() + 3000].strip()
+
+        raw_abstract = truncate_to_tokens(raw_abstract)
+
+        # The summary is streamed by the results page (see Route 5) unless
+        # it is already cached
+        summary = await asyncio.to_thread(get_cached_response, "summary", raw_abstract)
+
+        # Pre-warm the cache with the default quiz and flashcards (same
+        # defaults as their routes) while the user reads the summary. Skipped
+        # when there is no real abstract or no client to call
+        if start_match and client:
+            prewarm = asyncio.gather(
+                request_quiz(raw_abstract, 3, "medium", batched=False),
+                request_flashcards(raw_abstract, 5),
+            )
+            background_tasks.add(prewarm)
+            prewarm.add_done_callback(background_tasks.discard)
+            prewarm.add_done_callback(log_task_error)
 
         # Return the STYLED results page
         return templates.TemplateResponse("results.html", {
@@ -94,54 +325,57 @@ async def upload_paper(request: Request, paper: UploadFile = File(...)):
         return RedirectResponse(url="/", status_code=303)
 
     finally:
-        # Clean up the temp file
-        if os.path.exists(temp_pdf_path):
-            os.remove(temp_pdf_path)
         await paper.close()
 
 
 
 
 # Route 3: The Quiz Generator (GET /quiz)
-def generate_quiz_from_text(text: str, num_questions: int, difficulty: str):
+# Called with text that request_quiz has already truncated and looked up
+# in the cache
+async def generate_quiz_from_text(text: str, num_questions: int, difficulty: str):
     if not client:
         print("Error: Mistral client is not initialized.")
         return []
 
-    prompt = f"""
+    # Everything that does not depend on the request parameters goes in the
+    # system message, so the (rules + abstract) prefix is identical across
+    # calls and provider-side prefix caching can reuse it
+    system_prompt = f"""
+    You are a helpful assistant that strictly follows instructions to generate a quiz in a JSON format.
     You are an expert at creating educational quizzes from academic text.
-    Your task is to generate a quiz with {num_questions} unique, high-quality questions based on the provided text.
 
     Rules:
     - Output ONLY a valid JSON object with a single key "questions".
     - Each item must have keys: "question", "options" (an array of 4 strings), "answer" ("A", "B", "C", or "D"), and "explanation".
-    - The difficulty level should be: {difficulty}.
     - Base all questions STRICTLY on the text provided below.
     
     ### Provided Text ###
     {text}
     """
+
+    prompt = f"Generate a quiz with {num_questions} unique, high-quality questions based on the provided text. The difficulty level should be: {difficulty}."
     
     try:
         messages = [
-            {"role": "system", "content": "You are a helpful assistant that strictly follows instructions to generate a quiz in a JSON format."},
+            {"role": "system", "content": system_prompt},
             {"role": "user", "content": prompt}
         ]
 
-        chat_response = client.chat.complete(
+        chat_response = await client.chat.parse_async(
+            response_format=QuizOut,
             model="mistral-small-latest",
-            response_format={"type": "json_object"},
             messages=messages
         )
         
-        content_str = chat_response.choices[0].message.content
-        parsed_json = json.loads(content_str)
-        q_list = parsed_json.get('questions', [])
-        
-        if not isinstance(q_list, list):
-            print("Error: The 'questions' key did not contain a list.")
+        parsed = chat_response.choices[0].message.parsed
+        if parsed is None:
+            print("Error: The model did not return a quiz.")
             return []
+        q_list = [q.model_dump() for q in parsed.questions]
             
+        if q_list:
+            await asyncio.to_thread(cache_response, "quiz", text, q_list, num_questions, difficulty)
         return q_list
 
     except Exception as e:
@@ -150,6 +384,146 @@ def generate_quiz_from_text(text: str, num_questions: int, difficulty: str):
     
 
 
+# Micro-batching: concurrent quiz requests are collected for up to
+# QUIZ_BATCH_WAIT seconds (or QUIZ_BATCH_SIZE items) and sent as one call.
+# The batch size is kept small because every user in a batch waits for all
+# of its quizzes to be decoded in a single response
+QUIZ_BATCH_SIZE = 4
+QUIZ_BATCH_WAIT = 0.05
+quiz_queue = None  # created with the worker, inside the running event loop
+quiz_worker = None
+
+
+async def generate_quiz_batch(items: list):
+    # A batch of one uses the regular single-quiz prompt
+    if len(items) == 1:
+        return [await generate_quiz_from_text(*items[0])]
+
+    if not client:
+        print("Error: Mistral client is not initialized.")
+        return [[] for _ in items]
+
+    system_prompt = """
+    You are a helpful assistant that strictly follows instructions to generate quizzes in a JSON format.
+    You are an expert at creating educational quizzes from academic text.
+
+    Rules:
+    - Output ONLY a valid JSON object with a single key "quizzes".
+    - "quizzes" must be an array with exactly one entry per provided text, in the same order.
+    - Each entry must be an object with a single key "questions".
+    - Each question must have keys: "question", "options" (an array of 4 strings), "answer" ("A", "B", "C", or "D"), and "explanation".
+    - Base each quiz STRICTLY on its own provided text.
+    """
+
+    prompt = "\n\n".join(
+        f"### Provided Text {i + 1} ({num_questions} questions, difficulty: {difficulty}) ###\n{text}"
+        for i, (text, num_questions, difficulty) in enumerate(items)
+    )
+
+    try:
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ]
+
+        chat_response = await client.chat.parse_async(
+            response_format=QuizBatchOut,
+            model="mistral-small-latest",
+            messages=messages
+        )
+
+        parsed = chat_response.choices[0].message.parsed
+        # Results are matched to requests by position, so anything but exactly
+        # one quiz per text could hand a quiz for the wrong paper. They are
+        # also never cached: the texts come from different users' query
+        # strings in one prompt, so one user's text could steer the quizzes
+        # of the others, and caching would serve that to every later visitor
+        if parsed is not None and len(parsed.quizzes) == len(items):
+            return [[q.model_dump() for q in quiz.questions] for quiz in parsed.quizzes]
+        print(f"Error: The model returned the wrong number of quizzes for a batch of {len(items)}.")
+
+    except Exception as e:
+        print(f"An unexpected error occurred with the Mistral API call: {e}")
+
+    # Fall back to one call per item rather than failing every user in the batch
+    return await asyncio.gather(*(generate_quiz_from_text(*item) for item in items))
+
+
+async def run_quiz_batch(batch: list):
+    items = [(text, num_questions, difficulty) for text, num_questions, difficulty, _ in batch]
+    try:
+        results = await generate_quiz_batch(items)
+    except Exception as e:
+        print(f"Error: quiz batch failed: {e}")
+        results = [[] for _ in items]
+    for (_, _, _, future), result in zip(batch, results):
+        if not future.done():
+            future.set_result(result)
+
+
+async def quiz_batch_worker():
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await quiz_queue.get()]
+        deadline = loop.time() + QUIZ_BATCH_WAIT
+        while len(batch) < QUIZ_BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(quiz_queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        # Dispatch without waiting, so the next batch can start collecting
+        task = asyncio.create_task(run_quiz_batch(batch))
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+        task.add_done_callback(log_task_error)
+
+
+def start_quiz_batcher():
+    global quiz_queue, quiz_worker
+    if quiz_worker is not None and not quiz_worker.done():
+        return
+    quiz_queue = asyncio.Queue()
+    quiz_worker = asyncio.create_task(quiz_batch_worker())
+    quiz_worker.add_done_callback(log_task_error)
+
+
+async def stop_quiz_batcher():
+    global quiz_queue, quiz_worker
+    if quiz_worker is None:
+        return
+    quiz_worker.cancel()
+    with suppress(asyncio.CancelledError):
+        await quiz_worker
+    quiz_queue = quiz_worker = None
+
+
+async def enqueue_quiz(text: str, num_questions: int, difficulty: str):
+    # Normally started by the lifespan; also covers apps run without one
+    start_quiz_batcher()
+    future = asyncio.get_running_loop().create_future()
+    await quiz_queue.put((text, num_questions, difficulty, future))
+    return await future
+
+
+async def request_quiz(text: str, num_questions: int, difficulty: str, batched: bool = True):
+    text = truncate_to_tokens(text)
+    cached = await asyncio.to_thread(get_cached_response, "quiz", text, num_questions, difficulty)
+    if cached is not None:
+        return cached
+
+    # Batched results are not cached, so callers that exist only to fill the
+    # cache (the upload pre-warm) go straight to a single-quiz call
+    if batched:
+        make_coro = lambda: enqueue_quiz(text, num_questions, difficulty)
+    else:
+        make_coro = lambda: generate_quiz_from_text(text, num_questions, difficulty)
+    return await share_pending(make_cache_key("quiz", text, num_questions, difficulty), make_coro)
+
+
 @app.get('/quiz')
 async def get_quiz_questions(
     request: Request,
@@ -157,7 +531,7 @@ async def get_quiz_questions(
     difficulty: str = Query("medium", enum=["easy", "medium", "hard"]),
     num_questions: int = Query(3, ge=1, le=5)
 ):
-    questions = generate_quiz_from_text(
+    questions = await request_quiz(
         text=abstract, 
         num_questions=num_questions, 
         difficulty=difficulty
@@ -180,14 +554,15 @@ async def get_quiz_questions(
 
 
 # Route 4: The Flashcard Generator (GET /flashcards)
-def generate_flashcards_from_text(text: str, num_cards: int):
+async def generate_flashcards_from_text(text: str, num_cards: int):
     if not client:
         print("Error: Mistral client is not initialized.")
         return []
 
-    prompt = f"""
+    # Keep the (rules + abstract) prefix stable across calls, as for the quiz
+    system_prompt = f"""
+    You are a helpful assistant that strictly follows instructions to generate flashcards in a JSON format.
     You are an expert at creating educational study materials.
-    Your task is to generate {num_cards} key-term flashcards based on the provided text.
 
     Rules:
     - Output ONLY a valid JSON object with a single key "flashcards".
@@ -197,27 +572,29 @@ def generate_flashcards_from_text(text: str, num_cards: int):
     ### Provided Text ###
     {text}
     """
+
+    prompt = f"Generate {num_cards} key-term flashcards based on the provided text."
     
     try:
         messages = [
-            {"role": "system", "content": "You are a helpful assistant that strictly follows instructions to generate flashcards in a JSON format."},
+            {"role": "system", "content": system_prompt},
             {"role": "user", "content": prompt}
         ]
 
-        chat_response = client.chat.complete(
+        chat_response = await client.chat.parse_async(
+            response_format=FlashcardsOut,
             model="mistral-small-latest",
-            response_format={"type": "json_object"},
             messages=messages
         )
         
-        content_str = chat_response.choices[0].message.content
-        parsed_json = json.loads(content_str)
-        card_list = parsed_json.get('flashcards', [])
-        
-        if not isinstance(card_list, list):
-            print("Error: The 'flashcards' key did not contain a list.")
+        parsed = chat_response.choices[0].message.parsed
+        if parsed is None:
+            print("Error: The model did not return any flashcards.")
             return []
+        card_list = [card.model_dump() for card in parsed.flashcards]
             
+        if card_list:
+            await asyncio.to_thread(cache_response, "flashcards", text, card_list, num_cards)
         return card_list
 
     except Exception as e:
@@ -226,13 +603,26 @@ def generate_flashcards_from_text(text: str, num_cards: int):
     
 
 
+async def request_flashcards(text: str, num_cards: int):
+    # The abstract comes straight from the query string, so cap it here too
+    text = truncate_to_tokens(text)
+    cached = await asyncio.to_thread(get_cached_response, "flashcards", text, num_cards)
+    if cached is not None:
+        return cached
+
+    return await share_pending(
+        make_cache_key("flashcards", text, num_cards),
+        lambda: generate_flashcards_from_text(text, num_cards)
+    )
+
+
 @app.get('/flashcards')
 async def get_flashcards(
     request: Request,
     abstract: str = Query(...),
     num_cards: int = Query(5, ge=1, le=10) # Default to 5 cards
 ):
-    flashcards = generate_flashcards_from_text(
+    flashcards = await request_flashcards(
         text=abstract, 
         num_cards=num_cards
     )
@@ -249,4 +639,64 @@ async def get_flashcards(
         "request": request,
         "flashcards": flashcards,
         "error": None
-    })
\ No newline at end of file
+    })
+
+
+
+# Route 5: The Summary Stream (GET /summary/stream)
+def format_sse(data: str, event: str = None):
+    # JSON-encode so newlines in the text cannot break the SSE framing
+    message = f"data: {orjson.dumps(data).decode()}\n\n"
+    if event:
+        message = f"event: {event}\n{message}"
+    return message
+
+
+def stream_summary_from_text(text: str):
+    if not client:
+        yield format_sse("Mistral API client not configured. Please set MISTRAL_API_KEY in .env")
+        yield format_sse("", event="done")
+        return
+
+    text = truncate_to_tokens(text)
+    cached = get_cached_response("summary", text)
+    if cached is not None:
+        yield format_sse(cached)
+        yield format_sse("", event="done")
+        return
+
+    try:
+        messages = [
+            {"role": "system", "content": "You are a helpful assistant. Your task is to summarize the following academic abstract into one simple, easy-to-understand paragraph for a non-expert."},
+            {"role": "user", "content": f"Please summarize this abstract:\n\n{text}"}
+        ]
+
+        parts = []
+        # The context manager closes the upstream response if the browser
+        # disconnects, so Mistral stops generating billed tokens
+        with client.chat.stream(
+            model="mistral-small-latest",
+            messages=messages,
+        ) as stream:
+            for chunk in stream:
+                content = chunk.data.choices[0].delta.content
+                if content:
+                    parts.append(content)
+                    yield format_sse(content)
+
+        if parts:
+            cache_response("summary", text, "".join(parts))
+    except Exception as e:
+        yield format_sse(f"Mistral API error: {e}")
+
+    yield format_sse("", event="done")
+
+
+@app.get('/summary/stream')
+async def get_summary_stream(abstract: str = Query(...)):
+    # A sync generator, so Starlette iterates it in a threadpool
+    return StreamingResponse(
+        stream_summary_from_text(abstract),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )